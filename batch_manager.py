@@ -2,12 +2,15 @@ import time
 from typing import List
 from .data_models import Task, Truck
 from .dynamic_reroute import dynamic_reroute
+from .time_matrix import seconds_of_day
 
 class BatchManager:
-    def __init__(self, trucks: List[Truck], distance_matrix, duration_matrix, batch_size: int = 5, batch_interval: int = 30):
+    def __init__(self, trucks: List[Truck], distance_matrix, duration_matrix, batch_size: int = 5, batch_interval: int = 30,
+                 cost_model=None):
         self.trucks = trucks
         self.distance_matrix = distance_matrix
         self.duration_matrix = duration_matrix
+        self.cost_model = cost_model
         self.pending_tasks: List[Task] = []
         self.last_flush_time = time.time()
         self.batch_size = batch_size
@@ -25,7 +28,9 @@ class BatchManager:
                 trucks=self.trucks,
                 new_task=task,
                 distance_matrix=self.distance_matrix,
-                duration_matrix=self.duration_matrix
+                duration_matrix=self.duration_matrix,
+                departure_time=seconds_of_day(),
+                cost_model=self.cost_model
             )
         self.pending_tasks = []
         self.last_flush_time = time.time()
@@ -0,0 +1,69 @@
+import contextlib
+import io
+import random
+import time
+from solver.data_models import Task
+from solver.scoring import RouteCostModel, choose_best_path
+from solver.time_matrix import TimeDependentMatrix
+
+NUM_ROUTES = 10000
+NUM_TASKS = 200
+SEED = 42
+
+random.seed(SEED)
+
+# -------- Mock Matrices & Tasks --------
+task_ids = [f"T{i:03d}" for i in range(NUM_TASKS)]
+distance_matrix = {a: {b: (0 if a == b else round(random.uniform(0.5, 25.0), 3)) for b in task_ids} for a in task_ids}
+duration_matrix = {a: {b: (0 if a == b else random.randint(60, 3600)) for b in task_ids} for a in task_ids}
+time_matrix = TimeDependentMatrix.from_profile(duration_matrix)
+
+tasks = {
+    tid: Task(
+        task_id=tid,
+        location=[random.uniform(77.58, 77.64), random.uniform(12.93, 13.02)],
+        demand=1,
+        earliest=0,
+        latest=1000,
+        is_perishable=random.random() < 0.3,
+        is_confirmed=random.random() < 0.8,
+        type="pickup"
+    )
+    for tid in task_ids
+}
+routes = [[tasks[tid] for tid in random.sample(task_ids, random.randint(2, 12))] for _ in range(NUM_ROUTES)]
+
+
+def bench(name, durations, departure_time):
+    # -------- Per-route Loop (includes choose_best_path's debug-print formatting) --------
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # silence choose_best_path debug output
+        expected = [
+            choose_best_path(route, distance_matrix, durations,
+                             perishable=any(t.is_perishable for t in route),
+                             departure_time=departure_time)
+            for route in routes
+        ]
+    loop_time = time.perf_counter() - start
+
+    # -------- Batch Scoring --------
+    start = time.perf_counter()
+    model = RouteCostModel(distance_matrix, durations)
+    compiled = model.compile_routes(routes)
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    costs = model.score_indices(*compiled, departure_time=departure_time)
+    score_time = time.perf_counter() - start
+
+    batch_time = compile_time + score_time
+    mismatches = sum(1 for a, b in zip(expected, costs.tolist()) if a != b)
+    print(f"\n📊 {name}: {NUM_ROUTES} routes, {NUM_TASKS} tasks, seed {SEED}")
+    print(f"choose_best_path loop (with debug prints): {loop_time * 1000:.1f} ms")
+    print(f"Batch compile: {compile_time * 1000:.1f} ms | score: {score_time * 1000:.1f} ms | end-to-end: {batch_time * 1000:.1f} ms")
+    print(f"Speed-up end-to-end: {loop_time / batch_time:.1f}x | score only (model reused): {loop_time / score_time:.0f}x")
+    print(f"Mismatches: {mismatches}")
+
+
+bench("Static durations", duration_matrix, 0)
+bench("Time-dependent durations (08:00)", time_matrix, 8 * 3600)
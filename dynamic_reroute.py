@@ -1,22 +1,26 @@
-def dynamic_reroute(trucks, new_task, distance_matrix, duration_matrix):
-    from .scoring import choose_best_path
+import numpy as np
 
-    best_cost = float("inf")
-    best_truck = None
-    best_position = -1
 
+def dynamic_reroute(trucks, new_task, distance_matrix, duration_matrix, departure_time=0, cost_model=None):
+    from .scoring import RouteCostModel
+
+    # Score every insertion position of every truck in one batch; `cost_model`
+    # is the pre-compiled form of the two matrices when the caller keeps one
+    model = cost_model or RouteCostModel(distance_matrix, duration_matrix)
+    width = max((len(truck.route) for truck in trucks), default=0) + 1
+    owners, positions, batches = [], [], []
     for truck in trucks:
-        route = truck.route[:]
-        for i in range(len(route) + 1):
-            trial = route[:i] + [new_task] + route[i:]
-            cost = choose_best_path(trial, distance_matrix, duration_matrix,
-                                    perishable=any(t.is_perishable for t in trial))
-            if cost < best_cost:
-                best_cost = cost
-                best_truck = truck
-                best_position = i
+        trials = model.insertion_trials(truck.route, new_task, width)
+        batches.append(trials)
+        owners.extend([truck] * len(trials[0]))
+        positions.extend(range(len(trials[0])))
+
+    if not batches:
+        return None
 
-    if best_truck:
-        best_truck.route = best_truck.route[:best_position] + [new_task] + best_truck.route[best_position:]
+    costs = model.score_indices(*(np.concatenate(parts) for parts in zip(*batches)), departure_time)
+    best = int(np.argmin(costs))  # first minimum, same tie-break as a strict `<` scan
+    best_truck, best_position = owners[best], positions[best]
+    best_truck.route = best_truck.route[:best_position] + [new_task] + best_truck.route[best_position:]
 
-    return best_truck.id if best_truck else None
+    return best_truck.id
@@ -2,7 +2,6 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
-import requests
 import random
 
 # Solver modules
@@ -10,16 +9,24 @@ from solver.dynamic_reroute import dynamic_reroute
 from solver.batch_manager import BatchManager
 from solver.utils import (
     get_route_cost_for_truck,
-    get_ors_matrix,
-    update_truck_indices,
+    get_route_costs_for_trucks,
+    get_travel_matrix,
 )
+from solver.scoring import RouteCostModel
 from solver.single_solver import solve_vrp_with_tasks
 from solver.data_models import Task, Truck
 from solver.task_utils import create_task_from_input
+from solver.progress_tracker import ProgressTracker
+from solver.time_matrix import TimeDependentMatrix, seconds_of_day
+from solver.routing import RoadGraphProvider, get_routing_provider, set_routing_provider
 
 # Constants
-ORS_API_KEY = "Yor api key"
-ORS_DIRECTIONS_URL = "ors directions for truck"
+# Matrices and geometry use the offline haversine backend unless a road graph
+# file is given here (ORS stays available via set_routing_provider(utils.ors_provider)).
+ROAD_GRAPH_PATH: Optional[str] = None
+
+if ROAD_GRAPH_PATH:
+    set_routing_provider(RoadGraphProvider.from_file(ROAD_GRAPH_PATH))
 
 # FastAPI setup
 app = FastAPI()
@@ -38,6 +45,8 @@ trucks: List[Truck] = []
 tasks: List[Task] = []
 ghost_tasks: List[Task] = []
 distance_matrix, duration_matrix = {}, {}
+duration_slots: Optional[TimeDependentMatrix] = None  # rush-hour aware durations
+cost_model: Optional[RouteCostModel] = None  # compiled once per matrix refresh for batch scoring
 
 # -------------------------------
 # Data Models
@@ -57,6 +66,13 @@ class ReroutePayload(BaseModel):
     type: str  # "pickup" or "delivery"
     truck_id: int
 
+class LocationUpdate(BaseModel):
+    location: List[float]  # [lon, lat]
+    timestamp: Optional[float] = None
+
+class LocationPing(LocationUpdate):
+    truck_id: int
+
 # -------------------------------
 # Helper Functions
 # -------------------------------
@@ -66,11 +82,19 @@ def distance(loc1, loc2):
     return ((lon1 - lon2) ** 2 + (lat1 - lat2) ** 2) ** 0.5
 
 def load_and_update_matrix():
-    global distance_matrix, duration_matrix
+    global distance_matrix, duration_matrix, duration_slots, cost_model
     all_tasks = [task for truck in trucks for task in truck.route] + tasks
     unique_tasks = list({t.task_id: t for t in all_tasks}.values())
-    distance_matrix, duration_matrix = get_ors_matrix(unique_tasks)
-    update_truck_indices(duration_matrix)
+    distance_matrix, duration_matrix = get_travel_matrix(unique_tasks)
+    duration_slots = TimeDependentMatrix.from_profile(duration_matrix)
+    cost_model = RouteCostModel(distance_matrix, duration_slots)
+    tracker.set_duration_matrix(duration_slots)
+    batcher.distance_matrix, batcher.duration_matrix = distance_matrix, duration_slots
+    batcher.cost_model = cost_model
+
+def check_location(location):
+    if len(location) != 2:
+        raise HTTPException(status_code=422, detail=f"location must be [lon, lat], got {location}")
 
 def random_location():
     lat = round(random.uniform(12.93, 13.02), 6)
@@ -78,7 +102,7 @@ def random_location():
     return [lon, lat]
 
 def generate_bulk_data():
-    global trucks, tasks, ghost_tasks, distance_matrix, duration_matrix
+    global trucks, tasks, ghost_tasks, distance_matrix, duration_matrix, duration_slots, cost_model
     depot_location = [77.5946, 12.9716]
 
     tasks.clear()
@@ -131,7 +155,9 @@ def generate_bulk_data():
 
     all_tasks = [task for truck in trucks for task in truck.route] + tasks
     unique_tasks = list({t.task_id: t for t in all_tasks}.values())
-    distance_matrix, duration_matrix = get_ors_matrix(unique_tasks)
+    distance_matrix, duration_matrix = get_travel_matrix(unique_tasks)
+    duration_slots = TimeDependentMatrix.from_profile(duration_matrix)
+    cost_model = RouteCostModel(distance_matrix, duration_slots)
 
 # -------------------------------
 # Sample Initialization
@@ -139,13 +165,15 @@ def generate_bulk_data():
 if not trucks:
     generate_bulk_data()
 
-batcher = BatchManager(trucks, distance_matrix, duration_matrix)
+batcher = BatchManager(trucks, distance_matrix, duration_slots, cost_model=cost_model)
+tracker = ProgressTracker(trucks, duration_slots)
 
 # -------------------------------
 # API Endpoints
 # -------------------------------
 @app.get("/dashboard_state")
 def get_dashboard():
+    route_costs = get_route_costs_for_trucks(trucks, distance_matrix, duration_slots, cost_model=cost_model)
     return {
         "trucks": [
             {
@@ -154,9 +182,9 @@ def get_dashboard():
                 "route": [task.task_id for task in truck.route],
                 "capacity": truck.capacity,
                 "current_index": truck.current_index,
-                "route_cost": round(get_route_cost_for_truck(truck, distance_matrix, duration_matrix), 2),
+                "route_cost": round(cost, 2),
             }
-            for truck in trucks
+            for truck, cost in zip(trucks, route_costs)
         ],
         "all_tasks": [
             {
@@ -182,7 +210,8 @@ def reroute_with_task(new_task: TaskInput):
     task = create_task_from_input(new_task)
     tasks.append(task)
     load_and_update_matrix()
-    rerouted_truck_id = dynamic_reroute(trucks, task, distance_matrix, duration_matrix)
+    rerouted_truck_id = dynamic_reroute(trucks, task, distance_matrix, duration_slots,
+                                        departure_time=seconds_of_day(), cost_model=cost_model)
     return {"rerouted_truck_id": rerouted_truck_id}
 
 @app.post("/reroute_with_ghost")
@@ -216,24 +245,26 @@ def reroute_with_ghost(payload: ReroutePayload):
     # Step 4: Recalculate matrices after modification
     all_tasks = [task for truck in trucks for task in truck.route] + tasks
     unique_tasks = list({t.task_id: t for t in all_tasks}.values())
-    global distance_matrix, duration_matrix
-    distance_matrix, duration_matrix = get_ors_matrix(unique_tasks)
-
-    # Step 5: Request new geometry from ORS
+    global distance_matrix, duration_matrix, duration_slots, cost_model
+    distance_matrix, duration_matrix = get_travel_matrix(unique_tasks)
+    duration_slots = TimeDependentMatrix.from_profile(duration_matrix)
+    cost_model = RouteCostModel(distance_matrix, duration_slots)
+    tracker.set_duration_matrix(duration_slots)
+    batcher.distance_matrix, batcher.duration_matrix = distance_matrix, duration_slots
+    batcher.cost_model = cost_model
+
+    # Step 5: Request new geometry from the routing provider
     coords = [t.location for t in best_truck.route]
-    response = requests.post(
-        ORS_DIRECTIONS_URL,
-        headers={"Authorization": ORS_API_KEY, "Content-Type": "application/json"},
-        json={"coordinates": coords},
-    )
-    if response.status_code != 200:
-        raise HTTPException(status_code=500, detail=response.text)
+    try:
+        geometry = get_routing_provider().directions(coords)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
     return {
         "assigned_truck": best_truck.id,
         "route": [t.task_id for t in best_truck.route],
-        "updated_cost": round(get_route_cost_for_truck(best_truck, distance_matrix, duration_matrix), 2),
-        "geometry": response.json()["features"][0]["geometry"]["coordinates"],
+        "updated_cost": round(get_route_cost_for_truck(best_truck, distance_matrix, duration_slots), 2),
+        "geometry": geometry,
     }
 
 @app.get("/forecast_ghost_tasks", response_model=List[Task])
@@ -251,15 +282,12 @@ def get_truck_route_geom(truck_id: int):
     if len(coords) < 2:
         return {"geometry": []}
 
-    response = requests.post(
-        ORS_DIRECTIONS_URL,
-        headers={"Authorization": ORS_API_KEY, "Content-Type": "application/json"},
-        json={"coordinates": coords},
-    )
-    if response.status_code != 200:
-        return {"error": response.text}
+    try:
+        geometry = get_routing_provider().directions(coords)
+    except Exception as e:
+        return {"error": str(e)}
 
-    return {"geometry": response.json()["features"][0]["geometry"]["coordinates"]}
+    return {"geometry": geometry}
 
 @app.get("/truck_cost/{truck_id}")
 def get_truck_cost(truck_id: int):
@@ -267,21 +295,36 @@ def get_truck_cost(truck_id: int):
     if not truck:
         return {"error": "Truck not found"}
 
-    cost = get_route_cost_for_truck(truck, distance_matrix, duration_matrix)
+    cost = get_route_cost_for_truck(truck, distance_matrix, duration_slots)
     return {"truck_id": truck.id, "route_cost": round(cost, 2)}
 
 @app.post("/update_truck_location/{truck_id}")
-def update_truck_location(truck_id: int, payload: dict):
-    location = payload.get("location")
+def update_truck_location(truck_id: int, payload: LocationUpdate):
+    check_location(payload.location)
     truck = next((t for t in trucks if t.id == truck_id), None)
     if not truck:
         raise HTTPException(status_code=404, detail="Truck not found")
-    truck.current_location = location
-    return {"message": "Location updated"}
+    status = tracker.update(truck_id, payload.location, payload.timestamp)
+    return {"message": "Location updated", "progress": status}
+
+@app.post("/bulk_truck_locations")
+def bulk_truck_locations(pings: List[LocationPing]):
+    for ping in pings:
+        check_location(ping.location)
+    statuses = tracker.update_many([ping.dict() for ping in pings])
+    return {
+        "updated": len(statuses),
+        "progress": list(statuses.values()),
+        "needs_reroute": sorted(tracker.reroute_candidates),
+    }
 
 @app.post("/seed_example_data")
 def seed_example_data():
     generate_bulk_data()
+    tracker.set_trucks(trucks)
+    tracker.set_duration_matrix(duration_slots)
+    batcher.distance_matrix, batcher.duration_matrix = distance_matrix, duration_slots
+    batcher.cost_model = cost_model
     return {
         "message": "Seeded 6 trucks, 20 confirmed tasks, 10 ghost tasks.",
         "num_trucks": len(trucks),
@@ -0,0 +1,255 @@
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .data_models import Truck
+from .routing import equirectangular
+from .time_matrix import TimeDependentMatrix, seconds_of_day
+
+
+class RouteIndex:
+    """
+    Spatial index over the legs of a single truck route.
+
+    Stop coordinates are projected to a local metric plane and every leg
+    (segment between two consecutive stops) is bucketed into a uniform grid,
+    so snapping a ping only has to look at the legs near it.
+    Leg durations are read once from the duration matrix and kept as suffix
+    sums, which makes the remaining ETA an O(1) lookup per ping. With a
+    TimeDependentMatrix the clock starts at `departure_time` on the truck's
+    current leg and advances leg by leg, as in choose_best_path; `slot` and
+    `start_index` record what the index was timed from.
+    """
+
+    def __init__(self, truck: Truck, duration_matrix, cell_size_m: float = 500.0, departure_time: int = 0):
+        route = truck.route
+        self.signature = tuple(task.task_id for task in route)
+        self.cell_size_m = cell_size_m
+        self.slot = None
+        self.start_index = truck.current_index
+
+        coords = np.array([task.location for task in route], dtype=float).reshape(-1, 2)
+        self.origin = coords.mean(axis=0) if len(coords) else np.zeros(2)
+        self.points = self.project(coords)
+
+        # Leg i goes from stop i to stop i + 1
+        self.starts = self.points[:-1]
+        self.ends = self.points[1:]
+        self.vectors = self.ends - self.starts
+        self.lengths_sq = np.maximum((self.vectors ** 2).sum(axis=1), 1e-9)
+
+        if isinstance(duration_matrix, TimeDependentMatrix):
+            self.slot = duration_matrix.slot_for(departure_time)
+            # Legs already driven are never snapped to again, so they are not timed
+            leg_durations, clock = [0.0] * min(self.start_index, max(len(route) - 1, 0)), departure_time
+            for i in range(len(leg_durations), len(route) - 1):
+                leg_durations.append(duration_matrix.duration(route[i].task_id, route[i + 1].task_id, clock))
+                clock += leg_durations[-1]
+        else:
+            leg_durations = [
+                duration_matrix.get(route[i].task_id, {}).get(route[i + 1].task_id, 0) or 0
+                for i in range(len(route) - 1)
+            ]
+        self.leg_durations = np.array(leg_durations, dtype=float)
+        # remaining_after[i] = duration of all legs after leg i
+        self.remaining_after = np.concatenate(
+            [np.cumsum(self.leg_durations[::-1])[::-1][1:], [0.0]]
+        ) if len(leg_durations) else np.zeros(0)
+
+        self.grid: Dict[Tuple[int, int], List[int]] = {}
+        for leg in range(len(self.starts)):
+            lo = np.minimum(self.starts[leg], self.ends[leg]) // cell_size_m
+            hi = np.maximum(self.starts[leg], self.ends[leg]) // cell_size_m
+            for cx in range(int(lo[0]), int(hi[0]) + 1):
+                for cy in range(int(lo[1]), int(hi[1]) + 1):
+                    self.grid.setdefault((cx, cy), []).append(leg)
+
+    def project(self, coords: np.ndarray) -> np.ndarray:
+        """Equirectangular projection of [lon, lat] pairs to metres around the route origin."""
+        return equirectangular(coords, self.origin) * 1000.0
+
+    def candidate_legs(self, point: np.ndarray, min_leg: int) -> np.ndarray:
+        cx, cy = (point // self.cell_size_m).astype(int)
+        legs = set()
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                legs.update(self.grid.get((cx + dx, cy + dy), ()))
+        legs = [leg for leg in legs if leg >= min_leg]
+        if not legs:
+            # Truck is off-route: fall back to every remaining leg
+            legs = range(min_leg, len(self.starts))
+        return np.fromiter(legs, dtype=int)
+
+    def fit(self, point: np.ndarray, legs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Fraction along and distance to each of `legs` for a projected point."""
+        offsets = point - self.starts[legs]
+        t = np.clip((offsets * self.vectors[legs]).sum(axis=1) / self.lengths_sq[legs], 0.0, 1.0)
+        nearest = self.starts[legs] + t[:, None] * self.vectors[legs]
+        return t, np.sqrt(((nearest - point) ** 2).sum(axis=1))
+
+    def snap(self, location: List[float], min_leg: int = 0,
+             on_route_m: float = 0.0) -> Optional[Tuple[int, float, float]]:
+        """
+        Snap a [lon, lat] ping onto the route, never behind `min_leg`.
+        The current leg (`min_leg`) wins while the ping is within `on_route_m`
+        of it, and a later leg only wins when it is closer by more than that,
+        so a route crossing itself cannot pull the truck onto a later leg.
+        Returns (leg, fraction along leg, distance to route in metres).
+        """
+        if min_leg >= len(self.starts):
+            return None
+        point = self.project(location)[0]
+
+        current_t, current_dist = self.fit(point, np.array([min_leg]))
+        current = (min_leg, float(current_t[0]), float(current_dist[0]))
+        if current[2] <= on_route_m:
+            return current
+
+        legs = self.candidate_legs(point, min_leg)
+        t, dist = self.fit(point, legs)
+        best = int(np.argmin(dist))
+        if dist[best] >= current[2] - on_route_m:
+            return current
+        return int(legs[best]), float(t[best]), float(dist[best])
+
+    def distance_to_stop(self, location: List[float], stop: int) -> float:
+        point = self.project(location)[0]
+        return float(np.sqrt(((self.points[stop] - point) ** 2).sum()))
+
+    def remaining_eta(self, leg: int, fraction: float) -> float:
+        return float((1.0 - fraction) * self.leg_durations[leg] + self.remaining_after[leg])
+
+
+class ProgressTracker:
+    """
+    Tracks live truck progress from GPS pings.
+
+    Each ping is snapped onto the truck's route; `current_index` advances once
+    a stop is reached (within `arrival_radius_m`) or passed, and the remaining
+    ETA is refreshed from the duration matrix. Trucks whose ETA drifts from the
+    plan by more than `drift_threshold` (same unit as the duration matrix,
+    usually seconds) are collected in `reroute_candidates`.
+    """
+
+    def __init__(self, trucks: List[Truck], duration_matrix, arrival_radius_m: float = 75.0,
+                 drift_threshold: float = 300.0, cell_size_m: float = 500.0):
+        self.trucks = {truck.id: truck for truck in trucks}
+        self.duration_matrix = duration_matrix
+        self.arrival_radius_m = arrival_radius_m
+        self.drift_threshold = drift_threshold
+        self.cell_size_m = cell_size_m
+        self.indexes: Dict[int, RouteIndex] = {}
+        # Plan baseline per truck: (route signature, timestamp, remaining ETA at that timestamp)
+        self.plans: Dict[int, Tuple[tuple, float, float]] = {}
+        self.etas: Dict[int, float] = {}
+        self.drifts: Dict[int, float] = {}
+        self.reroute_candidates: Set[int] = set()
+
+    def set_trucks(self, trucks: List[Truck]):
+        self.trucks = {truck.id: truck for truck in trucks}
+        self.indexes.clear()
+        self.plans.clear()
+        self.etas.clear()
+        self.drifts.clear()
+        self.reroute_candidates.clear()
+
+    def set_duration_matrix(self, duration_matrix):
+        # Leg durations are re-read lazily; plan baselines survive unless the route changed
+        self.duration_matrix = duration_matrix
+        self.indexes.clear()
+        for truck in self.trucks.values():
+            self.drop_stale_plan(truck)
+
+    def drop_stale_plan(self, truck: Truck):
+        plan = self.plans.get(truck.id)
+        if plan is not None and plan[0] != tuple(task.task_id for task in truck.route):
+            # Route changed (reroute/new task): the old plan and its drift no longer apply
+            self.plans.pop(truck.id)
+            self.drifts.pop(truck.id, None)
+            self.reroute_candidates.discard(truck.id)
+
+    def get_index(self, truck: Truck, timestamp: Optional[float] = None) -> RouteIndex:
+        index = self.indexes.get(truck.id)
+        signature = tuple(task.task_id for task in truck.route)
+        departure_time = seconds_of_day(timestamp)
+        stale = index is None or index.signature != signature
+        if isinstance(self.duration_matrix, TimeDependentMatrix) and not stale:
+            stale = (index.slot != self.duration_matrix.slot_for(departure_time)
+                     or index.start_index != truck.current_index)
+        if stale:
+            # Rebuilt on route changes, and for traffic slots whenever the slot
+            # rolls over or the truck moves on to a new leg
+            index = RouteIndex(truck, self.duration_matrix, self.cell_size_m, departure_time)
+            self.indexes[truck.id] = index
+        self.drop_stale_plan(truck)
+        return index
+
+    def update(self, truck_id: int, location: List[float], timestamp: Optional[float] = None) -> Optional[dict]:
+        truck = self.trucks.get(truck_id)
+        if truck is None:
+            return None
+        timestamp = time.time() if timestamp is None else timestamp
+        truck.current_location = location
+
+        route = truck.route
+        if len(route) < 2 or truck.current_index >= len(route) - 1:
+            self.etas[truck_id] = 0.0
+            return self.status(truck_id)
+
+        index = self.get_index(truck, timestamp)
+        snapped = index.snap(location, min_leg=truck.current_index, on_route_m=self.arrival_radius_m)
+        if snapped is None:
+            return self.status(truck_id)
+        leg, fraction, _ = snapped
+
+        # Leaving the current leg for a later one means the stops in between were passed
+        current = max(truck.current_index, leg)
+        while current < len(route) - 1 and index.distance_to_stop(location, current + 1) <= self.arrival_radius_m:
+            current += 1
+            leg, fraction = current, 0.0
+        if current != truck.current_index:
+            truck.current_index = current
+            index = self.get_index(truck, timestamp)
+
+        eta = 0.0 if current >= len(route) - 1 else index.remaining_eta(leg, fraction)
+        self.etas[truck_id] = eta
+
+        plan = self.plans.setdefault(truck_id, (index.signature, timestamp, eta))
+        expected = max(plan[2] - (timestamp - plan[1]), 0.0)
+        drift = eta - expected
+        self.drifts[truck_id] = drift
+        if abs(drift) > self.drift_threshold:
+            self.reroute_candidates.add(truck_id)
+        else:
+            self.reroute_candidates.discard(truck_id)
+        return self.status(truck_id)
+
+    def update_many(self, pings: List[dict]) -> Dict[int, dict]:
+        """
+        Apply a batch of pings ({"truck_id", "location", "timestamp"?}).
+        Only the latest ping per truck is snapped: passed stops are still
+        detected because snapping never moves a truck backwards.
+        """
+        latest: Dict[int, dict] = {}
+        for ping in pings:
+            seen = latest.get(ping["truck_id"])
+            if seen is None or (ping.get("timestamp") or 0) >= (seen.get("timestamp") or 0):
+                latest[ping["truck_id"]] = ping
+
+        results = {}
+        for truck_id, ping in latest.items():
+            status = self.update(truck_id, ping["location"], ping.get("timestamp"))
+            if status is not None:
+                results[truck_id] = status
+        return results
+
+    def status(self, truck_id: int) -> dict:
+        truck = self.trucks[truck_id]
+        return {
+            "truck_id": truck_id,
+            "current_index": truck.current_index,
+            "eta_remaining": self.etas.get(truck_id, 0.0),
+            "eta_drift": self.drifts.get(truck_id, 0.0),
+            "needs_reroute": truck_id in self.reroute_candidates,
+        }
@@ -0,0 +1,242 @@
+import heapq
+import json
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
+
+import numpy as np
+import requests
+
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+    from scipy.spatial import cKDTree
+except ImportError:  # scipy is optional, pure-Python fallbacks are used instead
+    csr_matrix = None
+    csgraph_dijkstra = None
+    cKDTree = None
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_matrix(origins, destinations=None) -> np.ndarray:
+    """Great-circle distances in km between every [lon, lat] origin and destination."""
+    origins = np.radians(np.asarray(origins, dtype=float).reshape(-1, 2))
+    destinations = origins if destinations is None else np.radians(np.asarray(destinations, dtype=float).reshape(-1, 2))
+
+    lon1, lat1 = origins[:, 0:1], origins[:, 1:2]
+    lon2, lat2 = destinations[:, 0], destinations[:, 1]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def equirectangular(coords, origin) -> np.ndarray:
+    """Project [lon, lat] pairs to planar km east/north of `origin` (accurate at city scale)."""
+    coords = np.radians(np.asarray(coords, dtype=float).reshape(-1, 2))
+    lon0, lat0 = np.radians(np.asarray(origin, dtype=float))
+    x = (coords[:, 0] - lon0) * np.cos(lat0) * EARTH_RADIUS_KM
+    y = (coords[:, 1] - lat0) * EARTH_RADIUS_KM
+    return np.stack([x, y], axis=1)
+
+
+class RoutingProvider(ABC):
+    """
+    Interface every routing backend implements.
+    Matrices are returned as (distances, durations) arrays in km and seconds.
+    """
+
+    @abstractmethod
+    def matrix(self, locations: List[List[float]]) -> Tuple[np.ndarray, np.ndarray]:
+        ...
+
+    @abstractmethod
+    def directions(self, coordinates: List[List[float]]) -> List[List[float]]:
+        ...
+
+
+class HaversineProvider(RoutingProvider):
+    """
+    Offline provider: straight-line distance scaled by a circuity factor
+    (roads are longer than the crow flies) and a constant average speed.
+    """
+
+    def __init__(self, speed_kmh: float = 25.0, circuity: float = 1.3):
+        self.speed_kmh = speed_kmh
+        self.circuity = circuity
+
+    def matrix(self, locations):
+        distances = haversine_matrix(locations) * self.circuity
+        durations = distances / self.speed_kmh * 3600.0
+        return distances, durations
+
+    def directions(self, coordinates):
+        return [list(c) for c in coordinates]
+
+
+class RoadGraphProvider(RoutingProvider):
+    """
+    Offline provider over a local road graph.
+
+    Locations are snapped to their nearest graph node and matrices come from
+    multi-source Dijkstra (scipy's csgraph when installed, heapq otherwise).
+    """
+
+    def __init__(self, nodes, edges, directed: bool = False):
+        self.nodes = np.asarray(nodes, dtype=float).reshape(-1, 2)
+        n = len(self.nodes)
+        edges = np.asarray(edges, dtype=float).reshape(-1, 4)
+        u, v = edges[:, 0].astype(int), edges[:, 1].astype(int)
+        lengths, durations = edges[:, 2], edges[:, 3]
+        if not directed:
+            u, v = np.concatenate([u, v]), np.concatenate([v, u])
+            lengths, durations = np.concatenate([lengths, lengths]), np.concatenate([durations, durations])
+
+        self.adjacency = [[] for _ in range(n)]
+        for a, b, length, duration in zip(u.tolist(), v.tolist(), lengths.tolist(), durations.tolist()):
+            self.adjacency[a].append((b, length, duration))
+
+        self.origin = self.nodes.mean(axis=0) if n else np.zeros(2)
+        if csr_matrix is not None:
+            # Duplicate edges are summed by csr_matrix, so keep only the cheapest one
+            self.length_graph = self._sparse(u, v, lengths, n)
+            self.duration_graph = self._sparse(u, v, durations, n)
+        self.tree = cKDTree(equirectangular(self.nodes, self.origin)) if cKDTree is not None else None
+
+    @classmethod
+    def from_file(cls, path: str):
+        """
+        Load a graph from JSON:
+        {"nodes": [[lon, lat], ...], "edges": [[u, v, length_km, duration_s], ...], "directed": false}
+        """
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["nodes"], data["edges"], directed=data.get("directed", False))
+
+    @staticmethod
+    def _sparse(u, v, weights, n):
+        best = {}
+        for a, b, w in zip(u.tolist(), v.tolist(), weights.tolist()):
+            if (a, b) not in best or w < best[(a, b)]:
+                best[(a, b)] = w
+        keys = list(best.keys())
+        rows = [k[0] for k in keys]
+        cols = [k[1] for k in keys]
+        # Zero-weight edges would be dropped as "missing" by csgraph
+        data = [max(best[k], 1e-9) for k in keys]
+        return csr_matrix((data, (rows, cols)), shape=(n, n))
+
+    def snap(self, locations) -> np.ndarray:
+        """Index of the nearest graph node for every [lon, lat] location."""
+        locations = np.asarray(locations, dtype=float).reshape(-1, 2)
+        if self.tree is not None:
+            return self.tree.query(equirectangular(locations, self.origin))[1]
+        return np.argmin(haversine_matrix(locations, self.nodes), axis=1)
+
+    def _dijkstra(self, source: int, weight: int):
+        dist = {source: 0.0}
+        prev = {}
+        heap = [(0.0, source)]
+        while heap:
+            d, node = heapq.heappop(heap)
+            if d > dist.get(node, float("inf")):
+                continue
+            for edge in self.adjacency[node]:
+                nd = d + edge[weight]
+                if nd < dist.get(edge[0], float("inf")):
+                    dist[edge[0]] = nd
+                    prev[edge[0]] = node
+                    heapq.heappush(heap, (nd, edge[0]))
+        return dist, prev
+
+    def _shortest(self, sources, weight: int) -> np.ndarray:
+        """Costs from each source node to every graph node (weight 1 = length, 2 = duration)."""
+        if csgraph_dijkstra is not None:
+            graph = self.length_graph if weight == 1 else self.duration_graph
+            return csgraph_dijkstra(graph, directed=True, indices=sources)
+        costs = np.full((len(sources), len(self.nodes)), np.inf)
+        for row, source in enumerate(sources):
+            dist, _ = self._dijkstra(int(source), weight)
+            costs[row, list(dist.keys())] = list(dist.values())
+        return costs
+
+    def matrix(self, locations):
+        snapped = self.snap(locations)
+        sources, inverse = np.unique(snapped, return_inverse=True)
+        distances = self._shortest(sources, 1)[np.ix_(inverse, snapped)]
+        durations = self._shortest(sources, 2)[np.ix_(inverse, snapped)]
+        return distances, durations
+
+    def _predecessors(self, sources) -> np.ndarray:
+        """Fastest-path predecessor of every node, one row per source (-9999 where there is none)."""
+        if csgraph_dijkstra is not None:
+            _, predecessors = csgraph_dijkstra(self.duration_graph, directed=True, indices=sources,
+                                               return_predecessors=True)
+            return predecessors
+        predecessors = np.full((len(sources), len(self.nodes)), -9999, dtype=int)
+        for row, source in enumerate(sources):
+            _, prev = self._dijkstra(int(source), 2)
+            predecessors[row, list(prev.keys())] = list(prev.values())
+        return predecessors
+
+    def directions(self, coordinates):
+        snapped = self.snap(coordinates).tolist()
+        sources = sorted(set(snapped[:-1]))
+        predecessors = self._predecessors(sources)
+        rows = {source: row for row, source in enumerate(sources)}
+
+        geometry = [list(coordinates[0])]
+        for leg, (a, b) in enumerate(zip(snapped[:-1], snapped[1:])):
+            prev = predecessors[rows[a]]
+            path = [b]
+            while path[-1] != a:
+                if prev[path[-1]] < 0:
+                    raise Exception(f"No road path between nodes {a} and {b}")
+                path.append(int(prev[path[-1]]))
+            # Consecutive legs share their joining node; emit it once
+            path = path[::-1] if leg == 0 else path[-2::-1]
+            geometry.extend(self.nodes[node].tolist() for node in path)
+        geometry.append(list(coordinates[-1]))
+        return geometry
+
+
+class ORSProvider(RoutingProvider):
+    """OpenRouteService over HTTP, kept as an optional online provider."""
+
+    def __init__(self, api_key: str, matrix_url: str, directions_url: str):
+        self.matrix_url = matrix_url
+        self.directions_url = directions_url
+        self.headers = {
+            "Authorization": api_key,
+            "Content-Type": "application/json",
+        }
+
+    def matrix(self, locations):
+        body = {
+            "locations": locations,
+            "metrics": ["distance", "duration"],
+            "units": "km"
+        }
+        response = requests.post(self.matrix_url, json=body, headers=self.headers)
+        if response.status_code != 200:
+            raise Exception(f"ORS Error: {response.status_code} {response.text}")
+
+        data = response.json()
+        return np.array(data["distances"], dtype=float), np.array(data["durations"], dtype=float)
+
+    def directions(self, coordinates):
+        response = requests.post(self.directions_url, json={"coordinates": coordinates}, headers=self.headers)
+        if response.status_code != 200:
+            raise Exception(f"ORS Error: {response.status_code} {response.text}")
+        return response.json()["features"][0]["geometry"]["coordinates"]
+
+
+_active_provider: RoutingProvider = HaversineProvider()
+
+
+def get_routing_provider() -> RoutingProvider:
+    return _active_provider
+
+
+def set_routing_provider(provider: Optional[RoutingProvider]):
+    """Swap the routing backend used by the solver (None restores the offline default)."""
+    global _active_provider
+    _active_provider = provider if provider is not None else HaversineProvider()
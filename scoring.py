@@ -1,5 +1,12 @@
-def choose_best_path(route, distance_matrix, duration_matrix, perishable):
+import numpy as np
+
+from .time_matrix import TimeDependentMatrix
+
+
+def choose_best_path(route, distance_matrix, duration_matrix, perishable, departure_time=0):
     total_cost = 0
+    time_dependent = isinstance(duration_matrix, TimeDependentMatrix)
+    clock = departure_time
 
     print(f"[DEBUG] Route length: {len(route)}")
 
@@ -8,7 +15,12 @@ def choose_best_path(route, distance_matrix, duration_matrix, perishable):
         to_id = route[i + 1].task_id
 
         dist = distance_matrix.get(from_id, {}).get(to_id, 0)
-        time = duration_matrix.get(from_id, {}).get(to_id, 0)
+        if time_dependent:
+            # Each edge uses the traffic slot the truck departs in
+            time = duration_matrix.duration(from_id, to_id, clock)
+            clock += time
+        else:
+            time = duration_matrix.get(from_id, {}).get(to_id, 0)
 
         if dist == 0 and time == 0:
             print(f"[WARN] No data for {from_id} ➝ {to_id}")
@@ -27,3 +39,126 @@ def choose_best_path(route, distance_matrix, duration_matrix, perishable):
     print(f"[DEBUG] Total Cost: {total_cost}")
     return total_cost
 
+
+# Key of the trailing all-zero row/column in a compiled RouteCostModel
+UNKNOWN_TASK = object()
+
+
+class RouteCostModel:
+    """
+    Compiled form of the matrices used by choose_best_path.
+
+    Task ids are mapped to integer indices (plus a trailing all-zero "unknown"
+    index, matching the `.get(..., 0)` fallback) so many routes can be scored
+    at once from padded index arrays with NumPy gathers and masks.
+    """
+
+    def __init__(self, distance_matrix, duration_matrix):
+        self.time_dependent = isinstance(duration_matrix, TimeDependentMatrix)
+        keys = dict.fromkeys(distance_matrix or {})
+        keys.update(dict.fromkeys(duration_matrix.keys if self.time_dependent else (duration_matrix or {})))
+        self.keys = list(keys)
+        self.index = {key: i for i, key in enumerate(self.keys)}
+        self.unknown = len(self.keys)
+        n = self.unknown + 1
+
+        self.distances = self._dense(distance_matrix or {}, n)
+        if self.time_dependent:
+            # Re-order the slot tensors onto this model's indices
+            positions = np.array([duration_matrix.index.get(key, -1) for key in self.keys], dtype=int)
+            present = positions >= 0
+            rows = np.flatnonzero(present)
+            tensor = np.zeros((duration_matrix.num_slots, n, n))
+            tensor[:, rows[:, None], rows] = duration_matrix.tensor[:, positions[rows][:, None], positions[rows]]
+            self.durations = TimeDependentMatrix(tensor, self.keys + [UNKNOWN_TASK], duration_matrix.slot_seconds)
+        else:
+            self.durations = self._dense(duration_matrix or {}, n)
+
+    def _dense(self, matrix, n):
+        dense = np.zeros((n, n))
+        for a, row in matrix.items():
+            i = self.index[a]
+            for b, value in row.items():
+                j = self.index.get(b)
+                if j is not None and value is not None:
+                    dense[i, j] = value
+        return dense
+
+    def compile_routes(self, routes):
+        """
+        Pad routes of Tasks into index arrays.
+        Returns (indices, lengths, unconfirmed, perishable), padding with the unknown index.
+        """
+        width = max((len(route) for route in routes), default=0)
+        indices = np.full((len(routes), width), self.unknown, dtype=int)
+        unconfirmed = np.zeros((len(routes), width), dtype=bool)
+        lengths = np.zeros(len(routes), dtype=int)
+        perishable = np.zeros(len(routes), dtype=bool)
+        for r, route in enumerate(routes):
+            lengths[r] = len(route)
+            indices[r, :len(route)] = [self.index.get(task.task_id, self.unknown) for task in route]
+            unconfirmed[r, :len(route)] = [not task.is_confirmed for task in route]
+            perishable[r] = any(task.is_perishable for task in route)
+        return indices, lengths, unconfirmed, perishable
+
+    def insertion_trials(self, route, task, width=None):
+        """
+        Index arrays for inserting `task` at every position 0..len(route) of `route`.
+        Row i is route[:i] + [task] + route[i:], padded to `width` columns.
+        """
+        n = len(route)
+        width = n + 1 if width is None else width
+        route_idx, _, route_unconfirmed, route_perishable = self.compile_routes([route])
+
+        slots = np.arange(n + 1)
+        is_new = slots[None, :] == slots[:, None]
+        source = np.clip(slots[None, :] - (slots[None, :] > slots[:, None]), 0, max(n - 1, 0))
+        task_idx = self.index.get(task.task_id, self.unknown)
+
+        indices = np.full((n + 1, width), self.unknown, dtype=int)
+        unconfirmed = np.zeros((n + 1, width), dtype=bool)
+        route_cols = route_idx[0][source] if n else np.zeros_like(source)
+        unconfirmed_cols = route_unconfirmed[0][source] if n else np.zeros_like(source, dtype=bool)
+        indices[:, :n + 1] = np.where(is_new, task_idx, route_cols)
+        unconfirmed[:, :n + 1] = np.where(is_new, not task.is_confirmed, unconfirmed_cols)
+
+        lengths = np.full(n + 1, n + 1)
+        perishable = np.full(n + 1, bool(route_perishable[0]) or task.is_perishable)
+        return indices, lengths, unconfirmed, perishable
+
+    def score_indices(self, indices, lengths, unconfirmed, perishable, departure_time=0):
+        """
+        Weighted `dist + 0.5 * time` cost for every padded route in one pass.
+        Steps are accumulated left to right, so totals match choose_best_path exactly.
+        """
+        indices = np.asarray(indices, dtype=int)
+        routes = indices.shape[0]
+        totals = np.zeros(routes)
+        if indices.ndim != 2 or indices.shape[1] < 2:
+            return totals
+
+        lengths = np.asarray(lengths)
+        unconfirmed = np.asarray(unconfirmed, dtype=bool)
+        base_weight = np.where(np.broadcast_to(perishable, (routes,)), 1.5, 1.0)
+        clock = np.array(np.broadcast_to(departure_time, (routes,)), dtype=float)
+
+        for step in range(indices.shape[1] - 1):
+            active = step < lengths - 1
+            if not active.any():
+                break
+            from_idx, to_idx = indices[:, step], indices[:, step + 1]
+            dist = self.distances[from_idx, to_idx]
+            if self.time_dependent:
+                time = self.durations.lookup(from_idx, to_idx, clock)
+                clock += time
+            else:
+                time = self.durations[from_idx, to_idx]
+            weight = np.where(unconfirmed[:, step + 1], 0.2, base_weight)
+            totals += np.where(active, weight * (dist + 0.5 * time), 0.0)
+        return totals
+
+    def score(self, routes, perishable=None, departure_time=0):
+        indices, lengths, unconfirmed, route_perishable = self.compile_routes(routes)
+        if perishable is None:
+            perishable = route_perishable
+        return self.score_indices(indices, lengths, unconfirmed, perishable, departure_time)
@@ -1,26 +1,37 @@
 from ortools.constraint_solver import pywrapcp, routing_enums_pb2
 from solver.utils import compute_distance_duration_matrix
+from solver.time_matrix import BANGALORE_TRAFFIC_PROFILE, TimeDependentMatrix, seconds_of_day
 
-def solve_vrp_with_tasks(truck, task_list):
+def solve_vrp_with_tasks(truck, task_list, departure_time=None, traffic_profile=BANGALORE_TRAFFIC_PROFILE):
     coords = [truck.start_location] + [t.location for t in task_list]
 
     distance_matrix, duration_matrix = compute_distance_duration_matrix(coords)
 
+    # Durations for the traffic slot the truck leaves in (now, unless told otherwise)
+    departure_time = seconds_of_day() if departure_time is None else departure_time
+    time_matrix = TimeDependentMatrix.from_profile(duration_matrix, profile=traffic_profile)
+    slot_durations = time_matrix.slot_matrix(time_matrix.slot_for(departure_time))
+
     manager = pywrapcp.RoutingIndexManager(len(coords), 1, 0)
     routing = pywrapcp.RoutingModel(manager)
 
     def distance_callback(from_index, to_index):
         return int(distance_matrix[manager.IndexToNode(from_index)][manager.IndexToNode(to_index)])
-    routing.SetArcCostEvaluatorOfAllVehicles(distance_callback)
+    distance_callback_index = routing.RegisterTransitCallback(distance_callback)
+    routing.SetArcCostEvaluatorOfAllVehicles(distance_callback_index)
+
+    def time_callback(from_index, to_index):
+        return int(slot_durations[manager.IndexToNode(from_index), manager.IndexToNode(to_index)])
+    time_callback_index = routing.RegisterTransitCallback(time_callback)
 
     # Add time windows if tasks have earliest/latest
     time = 'Time'
     routing.AddDimension(
-        evaluator=distance_callback,
-        slack_max=300,
-        capacity=100000,
-        fix_start_cumul_to_zero=True,
-        name=time,
+        time_callback_index,
+        300,
+        100000,
+        True,
+        time,
     )
     time_dimension = routing.GetDimensionOrDie(time)
 
@@ -1,6 +1,6 @@
 import random
 from solver.data_models import Truck, Task
-from solver.utils import get_route_cost_for_truck
+from solver.utils import get_route_cost_for_truck, get_route_costs_for_trucks
 from solver.dynamic_reroute import dynamic_reroute
 from solver.ghost_forecast import insert_ghost_node
 
@@ -44,8 +44,7 @@ distance_matrix, duration_matrix = generate_mock_matrices(task_ids + ["T99", "T1
 # -------- Initial Cost Summary --------
 print("🔍 Initial Truck Routes and Costs")
 total_cost = 0
-for truck in trucks:
-    cost = get_route_cost_for_truck(truck, distance_matrix, duration_matrix)
+for truck, cost in zip(trucks, get_route_costs_for_trucks(trucks, distance_matrix, duration_matrix)):
     total_cost += cost
     route = [t.task_id for t in truck.route]
     print(f"Truck {truck.id} Route: {route} | Cost: {round(cost, 2)}")
@@ -90,5 +89,5 @@ new_cost = get_route_cost_for_truck(updated, distance_matrix, duration_matrix)
 print(f"New Route Cost for Truck {rerouted_id}: {round(new_cost, 2)}")
 
 # -------- Final Total Cost --------
-total_final = sum(get_route_cost_for_truck(t, distance_matrix, duration_matrix) for t in trucks)
+total_final = sum(get_route_costs_for_trucks(trucks, distance_matrix, duration_matrix))
 print(f"\n✅ Total Cost After Ghost + Dynamic Tasks: {round(total_final, 2)}")
@@ -0,0 +1,149 @@
+import pytest
+
+from solver.data_models import Task, Truck
+from solver.progress_tracker import ProgressTracker
+from solver.time_matrix import SERVICE_UTC_OFFSET_SECONDS, TimeDependentMatrix
+
+
+def make_task(task_id, location):
+    return Task(task_id=task_id, location=location, demand=1, earliest=0, latest=1000, type="pickup")
+
+
+def crossing_route():
+    # D -> E runs north-south straight through the middle of A -> B
+    return [
+        make_task("A", [77.600, 12.950]),
+        make_task("B", [77.620, 12.950]),
+        make_task("C", [77.620, 12.970]),
+        make_task("D", [77.610, 12.970]),
+        make_task("E", [77.610, 12.930]),
+    ]
+
+
+DURATIONS = {
+    "A": {"B": 400},
+    "B": {"C": 400},
+    "C": {"D": 200},
+    "D": {"E": 800},
+}
+
+
+def test_self_crossing_route_keeps_current_leg():
+    truck = Truck(id=1, capacity=10, route=crossing_route())
+    tracker = ProgressTracker([truck], DURATIONS, drift_threshold=120)
+
+    # GPS noise at the crossing puts the ping exactly on D -> E, ~20 m off A -> B
+    pings = [[77.600, 12.950], [77.605, 12.950], [77.610, 12.9502], [77.612, 12.950], [77.615, 12.950]]
+    for step, location in enumerate(pings):
+        status = tracker.update(1, location, timestamp=step * 75)
+        assert status["current_index"] == 0
+        assert not status["needs_reroute"]
+
+    status = tracker.update(1, [77.620, 12.950], timestamp=400)
+    assert status["current_index"] == 1
+
+
+def test_passed_stop_advances_without_arrival():
+    truck = Truck(id=1, capacity=10, route=crossing_route())
+    tracker = ProgressTracker([truck], DURATIONS)
+
+    tracker.update(1, [77.610, 12.950], timestamp=0)
+    # Halfway up B -> C, never within the arrival radius of B
+    status = tracker.update(1, [77.620, 12.960], timestamp=300)
+    assert status["current_index"] == 1
+    assert status["eta_remaining"] == pytest.approx(200 + 200 + 800)
+
+
+def test_matrix_refresh_keeps_drift_of_unchanged_routes():
+    slow = Truck(id=1, capacity=10, route=crossing_route())
+    rerouted = Truck(id=2, capacity=10, route=crossing_route())
+    tracker = ProgressTracker([slow, rerouted], DURATIONS, drift_threshold=120)
+
+    tracker.update(1, [77.600, 12.950], timestamp=0)
+    tracker.update(2, [77.600, 12.950], timestamp=0)
+    # Both trucks are stuck at A for 200 s
+    assert tracker.update(1, [77.600, 12.950], timestamp=200)["needs_reroute"]
+    assert tracker.update(2, [77.600, 12.950], timestamp=200)["needs_reroute"]
+
+    rerouted.route = rerouted.route[:2]
+    tracker.set_duration_matrix(DURATIONS)
+
+    status = tracker.update(1, [77.600, 12.950], timestamp=250)
+    assert status["needs_reroute"]
+    assert status["eta_drift"] == pytest.approx(250)
+    assert 2 not in tracker.reroute_candidates
+
+    status = tracker.update(2, [77.600, 12.950], timestamp=250)
+    assert not status["needs_reroute"]
+    assert status["eta_drift"] == 0
+
+
+def test_time_dependent_etas_follow_the_slot():
+    route = crossing_route()[:3]
+    truck = Truck(id=1, capacity=10, route=route)
+    # Free flow until 08:00, twice as slow from 08:00 to 09:00
+    profile = [1.0] * 8 + [2.0] + [1.0] * 15
+    slots = TimeDependentMatrix.from_profile(DURATIONS, keys=["A", "B", "C"], profile=profile)
+    tracker = ProgressTracker([truck], slots, drift_threshold=10000)
+    midnight = -SERVICE_UTC_OFFSET_SECONDS  # 00:00 in the service timezone
+
+    # At 07:55 the first leg departs in free flow, the second lands in the peak
+    status = tracker.update(1, [77.600, 12.950], timestamp=midnight + 7 * 3600 + 55 * 60)
+    assert status["eta_remaining"] == pytest.approx(400 + 800)
+
+    # Same spot after 08:00: the index is rebuilt with peak durations
+    status = tracker.update(1, [77.600, 12.950], timestamp=midnight + 8 * 3600 + 5 * 60)
+    assert status["eta_remaining"] == pytest.approx(800 + 800)
+
+
+def test_time_dependent_etas_start_from_the_current_leg():
+    route = crossing_route()[:4]
+    truck = Truck(id=1, capacity=10, route=route)
+    durations = {"A": {"B": 7200}, "B": {"C": 600}, "C": {"D": 600}}
+    # Three times slower from 08:00 to 09:00
+    profile = [1.0] * 8 + [3.0] + [1.0] * 15
+    slots = TimeDependentMatrix.from_profile(durations, keys=["A", "B", "C", "D"], profile=profile)
+    tracker = ProgressTracker([truck], slots, drift_threshold=100000)
+    six_am = -SERVICE_UTC_OFFSET_SECONDS + 6 * 3600
+
+    # From A at 06:00 the last two legs start after 08:00
+    status = tracker.update(1, [77.600, 12.950], timestamp=six_am)
+    assert status["eta_remaining"] == pytest.approx(7200 + 1800 + 1800)
+
+    # Reaching B at 06:05 re-times the remaining legs from B, all before 08:00
+    status = tracker.update(1, [77.620, 12.950], timestamp=six_am + 300)
+    assert status["current_index"] == 1
+    assert status["eta_remaining"] == pytest.approx(600 + 600)
+
+    # A truck already at index 1 is timed from its own leg too
+    late = Truck(id=2, capacity=10, route=route, current_index=1)
+    tracker.set_trucks([late])
+    status = tracker.update(2, [77.620, 12.950], timestamp=six_am)
+    assert status["eta_remaining"] == pytest.approx(600 + 600)
+
+
+def test_update_many_applies_the_latest_ping_per_truck():
+    first = Truck(id=1, capacity=10, route=crossing_route())
+    second = Truck(id=2, capacity=10, route=crossing_route())
+    tracker = ProgressTracker([first, second], DURATIONS)
+    tracker.update(1, [77.600, 12.950], timestamp=0)
+    tracker.update(2, [77.600, 12.950], timestamp=0)
+
+    statuses = tracker.update_many([
+        # Truck 1: latest ping is halfway up B -> C, having passed B between pings
+        {"truck_id": 1, "location": [77.620, 12.960], "timestamp": 300},
+        {"truck_id": 1, "location": [77.605, 12.950], "timestamp": 100},
+        # Truck 2: still on A -> B, older pings arrive last
+        {"truck_id": 2, "location": [77.610, 12.950], "timestamp": 200},
+        {"truck_id": 2, "location": [77.620, 12.960], "timestamp": 50},
+        {"truck_id": 2, "location": [77.605, 12.950], "timestamp": 100},
+        {"truck_id": 99, "location": [77.600, 12.950], "timestamp": 100},
+    ])
+
+    assert set(statuses) == {1, 2}
+    assert statuses[1]["current_index"] == 1
+    assert statuses[1]["eta_remaining"] == pytest.approx(200 + 200 + 800)
+    assert statuses[2]["current_index"] == 0
+    assert statuses[2]["eta_remaining"] == pytest.approx(200 + 400 + 200 + 800)
+    assert first.current_location == [77.620, 12.960]
+    assert second.current_location == [77.610, 12.950]
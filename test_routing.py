@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from solver import routing
+from solver.data_models import Task
+from solver.routing import RoadGraphProvider
+from solver.utils import get_travel_matrix
+
+NODES = [
+    [77.600, 12.950],
+    [77.610, 12.950],
+    [77.610, 12.960],
+    [77.700, 13.000],  # not connected to the rest
+]
+EDGES = [
+    [0, 1, 1.1, 100],
+    [1, 2, 1.2, 120],
+    [0, 2, 1.5, 400],  # shorter but slower than going through node 1
+]
+
+
+@pytest.fixture(params=["scipy", "heapq"])
+def graph(request, monkeypatch):
+    if request.param == "scipy":
+        pytest.importorskip("scipy")
+    else:
+        monkeypatch.setattr(routing, "csr_matrix", None)
+        monkeypatch.setattr(routing, "csgraph_dijkstra", None)
+        monkeypatch.setattr(routing, "cKDTree", None)
+    return RoadGraphProvider(NODES, EDGES)
+
+
+def make_task(task_id, location):
+    return Task(task_id=task_id, location=location, demand=1, earliest=0, latest=1000, type="pickup")
+
+
+def test_matrix_uses_shortest_and_fastest_paths(graph):
+    distances, durations = graph.matrix([[77.6001, 12.9501], [77.6101, 12.9601], [77.610, 12.950]])
+    np.testing.assert_allclose(distances, [[0, 1.5, 1.1], [1.5, 0, 1.2], [1.1, 1.2, 0]], atol=1e-6)
+    np.testing.assert_allclose(durations, [[0, 220, 100], [220, 0, 120], [100, 120, 0]], atol=1e-6)
+
+
+def test_directions_follow_the_fastest_path(graph):
+    start, end = [77.6001, 12.9501], [77.6101, 12.9601]
+    assert graph.directions([start, end]) == [start, NODES[0], NODES[1], NODES[2], end]
+    assert graph.directions([start, end, start]) == [start, NODES[0], NODES[1], NODES[2], NODES[1], NODES[0], start]
+
+
+def test_unreachable_pairs_are_rejected(graph):
+    tasks = [make_task("A", NODES[0]), make_task("Z", NODES[3])]
+    with pytest.raises(ValueError, match="A -> Z"):
+        get_travel_matrix(tasks, graph)
+    with pytest.raises(Exception, match="No road path"):
+        graph.directions([NODES[0], NODES[3]])
@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from solver.data_models import Task, Truck
+from solver.dynamic_reroute import dynamic_reroute
+from solver.scoring import RouteCostModel, choose_best_path
+from solver.time_matrix import TimeDependentMatrix
+
+TASK_IDS = [f"T{i:02d}" for i in range(12)]
+
+
+def make_task(rng, task_id):
+    return Task(
+        task_id=task_id,
+        location=[77.6, 12.95],
+        demand=1,
+        earliest=0,
+        latest=1000,
+        is_perishable=rng.random() < 0.3,
+        is_confirmed=rng.random() < 0.7,
+        type="pickup"
+    )
+
+
+def make_matrices(rng, time_dependent):
+    # Small integer ranges so ties between insertion positions are common
+    distance_matrix = {a: {b: rng.randint(0, 5) for b in TASK_IDS} for a in TASK_IDS}
+    duration_matrix = {a: {b: rng.randint(0, 5) * 600 for b in TASK_IDS} for a in TASK_IDS}
+    if time_dependent:
+        duration_matrix = TimeDependentMatrix.from_profile(duration_matrix)
+    return distance_matrix, duration_matrix
+
+
+def make_route(rng, size):
+    # "GHOST" is not in either matrix, like a freshly added task
+    return [make_task(rng, rng.choice(TASK_IDS + ["GHOST"])) for _ in range(size)]
+
+
+def reroute_by_loop(trucks, new_task, distance_matrix, duration_matrix, departure_time):
+    # The per-trial scan dynamic_reroute used before batch scoring
+    best_cost, best_truck, best_position = float("inf"), None, -1
+    for truck in trucks:
+        for i in range(len(truck.route) + 1):
+            trial = truck.route[:i] + [new_task] + truck.route[i:]
+            cost = choose_best_path(trial, distance_matrix, duration_matrix,
+                                    perishable=any(t.is_perishable for t in trial),
+                                    departure_time=departure_time)
+            if cost < best_cost:
+                best_cost, best_truck, best_position = cost, truck, i
+    return best_truck.id, best_position
+
+
+@pytest.mark.parametrize("time_dependent", [False, True])
+def test_batch_scores_match_choose_best_path(time_dependent, capsys):
+    rng = random.Random(7)
+    distance_matrix, duration_matrix = make_matrices(rng, time_dependent)
+    routes = [make_route(rng, size) for size in [0, 1, 2, 5, 9] * 20]
+    departure_time = 7 * 3600 + 50 * 60
+
+    costs = RouteCostModel(distance_matrix, duration_matrix).score(routes, departure_time=departure_time)
+    expected = [
+        choose_best_path(route, distance_matrix, duration_matrix,
+                         perishable=any(t.is_perishable for t in route),
+                         departure_time=departure_time)
+        for route in routes
+    ]
+    assert costs.tolist() == expected
+
+
+@pytest.mark.parametrize("time_dependent", [False, True])
+def test_dynamic_reroute_matches_per_trial_loop(time_dependent, capsys):
+    rng = random.Random(11)
+    for _ in range(50):
+        distance_matrix, duration_matrix = make_matrices(rng, time_dependent)
+        trucks = [Truck(id=i, capacity=10, route=make_route(rng, rng.randint(0, 5))) for i in range(4)]
+        new_task = make_task(rng, rng.choice(TASK_IDS + ["NEW"]))
+        departure_time = rng.randint(0, 86399)
+
+        expected = reroute_by_loop(trucks, new_task, distance_matrix, duration_matrix, departure_time)
+        truck_id = dynamic_reroute(trucks, new_task, distance_matrix, duration_matrix, departure_time)
+        truck = next(t for t in trucks if t.id == truck_id)
+        assert (truck_id, next(i for i, t in enumerate(truck.route) if t is new_task)) == expected
+
+
+def test_dynamic_reroute_without_trucks():
+    assert dynamic_reroute([], make_task(random.Random(0), "T00"), {}, {}) is None
@@ -0,0 +1,84 @@
+import time
+from typing import Hashable, Optional, Sequence
+
+import numpy as np
+
+SLOT_SECONDS = 3600
+DAY_SECONDS = 86400
+# Slots are wall-clock hours in the service area (Asia/Kolkata, UTC+05:30, no DST),
+# independent of the server's timezone.
+SERVICE_UTC_OFFSET_SECONDS = 5 * 3600 + 30 * 60
+
+# Hourly multipliers over free-flow durations for the Bangalore service area
+# (morning and evening peaks run 2-3x slower than the night baseline).
+BANGALORE_TRAFFIC_PROFILE = [
+    1.0, 1.0, 1.0, 1.0, 1.0, 1.1,    # 00:00 - 05:59
+    1.4, 1.9, 2.6, 2.8, 2.3, 1.8,    # 06:00 - 11:59
+    1.7, 1.7, 1.8, 1.9, 2.2, 2.7,    # 12:00 - 17:59
+    3.0, 2.8, 2.2, 1.6, 1.3, 1.1,    # 18:00 - 23:59
+]
+
+
+class TimeDependentMatrix:
+    """
+    Duration tensor indexed as [slot, from, to].
+
+    Slots are fixed-width windows of the day (`slot_seconds` wide); the slot for
+    a departure time wraps around once all slots are used. Every lookup is a
+    single tensor gather, so evaluation stays O(1) per edge.
+    """
+
+    def __init__(self, tensor, keys: Sequence[Hashable], slot_seconds: int = SLOT_SECONDS):
+        self.tensor = np.asarray(tensor, dtype=float)
+        if self.tensor.ndim != 3 or self.tensor.shape[1] != self.tensor.shape[2]:
+            raise ValueError("Duration tensor must have shape (slots, n, n).")
+        if self.tensor.shape[1] != len(keys):
+            raise ValueError("Number of keys must match the tensor size.")
+        self.keys = list(keys)
+        self.index = {key: i for i, key in enumerate(self.keys)}
+        self.slot_seconds = slot_seconds
+        self.num_slots = self.tensor.shape[0]
+
+    @classmethod
+    def from_profile(cls, durations, keys: Optional[Sequence[Hashable]] = None,
+                     profile: Sequence[float] = BANGALORE_TRAFFIC_PROFILE,
+                     slot_seconds: int = SLOT_SECONDS):
+        """
+        Build slot tensors by scaling a static matrix with per-slot multipliers.
+        `durations` is either a nested dict keyed by task id or an n x n list.
+        """
+        if isinstance(durations, dict):
+            keys = list(durations.keys()) if keys is None else list(keys)
+            base = np.array([[durations.get(a, {}).get(b, 0) or 0 for b in keys] for a in keys], dtype=float)
+        else:
+            base = np.asarray(durations, dtype=float)
+            keys = list(range(len(base))) if keys is None else list(keys)
+        base = base.reshape(len(keys), len(keys))  # an empty task set still gives a 2-D matrix
+        factors = np.asarray(profile, dtype=float)
+        return cls(factors[:, None, None] * base[None, :, :], keys, slot_seconds)
+
+    def slot_for(self, departure_time):
+        """Slot index for one departure time or an array of them (seconds since midnight)."""
+        slots = (np.asarray(departure_time) // self.slot_seconds).astype(int) % self.num_slots
+        return int(slots) if slots.ndim == 0 else slots
+
+    def lookup(self, from_idx, to_idx, departure_time):
+        """Vectorised duration lookup by matrix indices and departure times."""
+        return self.tensor[self.slot_for(departure_time), from_idx, to_idx]
+
+    def duration(self, from_id, to_id, departure_time=0, default=0):
+        i = self.index.get(from_id)
+        j = self.index.get(to_id)
+        if i is None or j is None:
+            return default
+        return float(self.tensor[self.slot_for(departure_time), i, j])
+
+    def slot_matrix(self, slot: int) -> np.ndarray:
+        return self.tensor[slot % self.num_slots]
+
+
+def seconds_of_day(timestamp: Optional[float] = None,
+                   utc_offset: int = SERVICE_UTC_OFFSET_SECONDS) -> int:
+    """Service-area seconds since midnight for a UNIX timestamp (now if omitted)."""
+    timestamp = time.time() if timestamp is None else timestamp
+    return int(timestamp + utc_offset) % DAY_SECONDS
@@ -1,61 +1,66 @@
-import requests
 import time
+import numpy as np
 from .data_models import Task,Truck
 from fastapi import HTTPException
 from typing import List,Tuple
+from .time_matrix import TimeDependentMatrix, seconds_of_day
+from .routing import ORSProvider, RoutingProvider, get_routing_provider
 ORS_API_KEY = "api key"
 ORS_MATRIX_URL = "ors matrix distance-time"
 ORS_URL = "direction for truck"
-HEADERS = {
-    "Authorization": ORS_API_KEY,
-    "Content-Type": "application/json"
-}
+ors_provider = ORSProvider(ORS_API_KEY, ORS_MATRIX_URL, ORS_URL)
 
 
-def get_ors_matrix(tasks):
-    locations = [task.location for task in tasks]
-    if len(locations) > 50:
-        raise ValueError("ORS supports only 50 locations per request.")
-
-    headers = {
-        "Authorization": ORS_API_KEY,
-        "Content-Type": "application/json",
-    }
-    body = {
-        "locations": locations,
-        "metrics": ["distance", "duration"],
-        "units": "km"
-    }
-
-    response = requests.post(ORS_URL, json=body, headers=headers)
-    if response.status_code != 200:
-        raise Exception(f"ORS Error: {response.status_code} {response.text}")
-
-    data = response.json()
+def matrices_by_task(tasks, distances, durations):
     task_ids = [task.task_id for task in tasks]
+    distances, durations = distances.tolist(), durations.tolist()
     distance_matrix = {
-        task_ids[i]: {task_ids[j]: data["distances"][i][j] for j in range(len(task_ids))}
+        task_ids[i]: dict(zip(task_ids, distances[i]))
         for i in range(len(task_ids))
     }
     duration_matrix = {
-        task_ids[i]: {task_ids[j]: data["durations"][i][j] for j in range(len(task_ids))}
+        task_ids[i]: dict(zip(task_ids, durations[i]))
         for i in range(len(task_ids))
     }
     return distance_matrix, duration_matrix
 
 
+def check_reachable(labels, distances, durations):
+    """Raise if the provider left any pair without a finite distance or duration (e.g. a disconnected road graph)."""
+    unreachable = ~(np.isfinite(distances) & np.isfinite(durations))
+    if unreachable.any():
+        pairs = [f"{labels[i]} -> {labels[j]}" for i, j in zip(*np.nonzero(unreachable))]
+        more = f" (+{len(pairs) - 5} more)" if len(pairs) > 5 else ""
+        raise ValueError(f"No route between {', '.join(pairs[:5])}{more}")
+
+
+def get_travel_matrix(tasks, provider: RoutingProvider = None):
+    """Distance (km) / duration (s) matrices keyed by task id from the active routing provider."""
+    provider = provider or get_routing_provider()
+    distances, durations = provider.matrix([task.location for task in tasks])
+    check_reachable([task.task_id for task in tasks], distances, durations)
+    return matrices_by_task(tasks, distances, durations)
+
+
+def get_ors_matrix(tasks):
+    if len(tasks) > 50:
+        raise ValueError("ORS supports only 50 locations per request.")
+    return get_travel_matrix(tasks, ors_provider)
+
+
 def satisfies_constraints(route, truck, allow_ghost_flexibility=False):
     return True
 
 
 
-from .scoring import choose_best_path
-from .utils import get_ors_matrix
+from .scoring import RouteCostModel, choose_best_path
 
-def get_route_cost_for_truck(truck, distance_matrix=None, duration_matrix=None):
+def get_route_cost_for_truck(truck, distance_matrix=None, duration_matrix=None, departure_time=None):
     """
     Computes the cost of the remaining route for a truck.
     If distance/duration matrix not passed, build it safely.
+    With a TimeDependentMatrix, durations follow the traffic slot of `departure_time`
+    (seconds since midnight, defaults to now).
     """
 
     future_route = truck.route[truck.current_index:]
@@ -67,9 +72,9 @@ def get_route_cost_for_truck(truck, distance_matrix=None, duration_matrix=None):
         try:
             # Build matrix only for the tasks in future route
             task_list = list({task.task_id: task for task in future_route}.values())  # Remove duplicates
-            distance_matrix, duration_matrix = get_ors_matrix(task_list)
+            distance_matrix, duration_matrix = get_travel_matrix(task_list)
         except Exception as e:
-            print(f"[ERROR] Failed to compute ORS matrix: {e}")
+            print(f"[ERROR] Failed to compute travel matrix: {e}")
             return 0
 
     # Debug print
@@ -80,42 +85,46 @@ def get_route_cost_for_truck(truck, distance_matrix=None, duration_matrix=None):
         route=future_route,
         distance_matrix=distance_matrix,
         duration_matrix=duration_matrix,
-        perishable=any(task.is_perishable for task in future_route)
+        perishable=any(task.is_perishable for task in future_route),
+        departure_time=seconds_of_day() if departure_time is None else departure_time,
     )
 
 
 
-def update_truck_indices(trucks,duration_matrix):
-    for truck in trucks:
-        route = truck.route
-        if truck.current_index >= len(route) - 1:
-            continue  # Already at end
-
-        from_task = route[truck.current_index]
-        to_task = route[truck.current_index + 1]
+def get_route_costs_for_trucks(trucks, distance_matrix=None, duration_matrix=None, departure_time=None,
+                               cost_model=None):
+    """
+    Remaining-route cost for every truck, scored in one batch.
+    Pass `cost_model` to reuse an already compiled RouteCostModel of the matrices.
+    Falls back to get_route_cost_for_truck when the matrices have to be built.
+    """
+    if cost_model is None and (not distance_matrix or not duration_matrix):
+        return [get_route_cost_for_truck(truck, distance_matrix, duration_matrix, departure_time) for truck in trucks]
 
-        # Simple simulation: if ETA < threshold (simulating that the truck moved), increase index
-        eta = duration_matrix.get(from_task.task_id, {}).get(to_task.task_id, 10)
-        if eta < 15:  # Simulated threshold for testing
-            truck.current_index += 1
+    model = cost_model or RouteCostModel(distance_matrix, duration_matrix)
+    costs = model.score(
+        [truck.route[truck.current_index:] for truck in trucks],
+        departure_time=seconds_of_day() if departure_time is None else departure_time,
+    )
+    return costs.tolist()
 
-def get_eta_to_next(truck:Truck , duration_matrix):
+def get_eta_to_next(truck:Truck , duration_matrix, departure_time=None):
     idx = truck.current_index
     route = truck.route
     if idx < len(route) - 1:
         from_id = route[idx].task_id
         to_id = route[idx + 1].task_id
+        if isinstance(duration_matrix, TimeDependentMatrix):
+            departure_time = seconds_of_day() if departure_time is None else departure_time
+            return duration_matrix.duration(from_id, to_id, departure_time, default=None)
         return duration_matrix.get(from_id, {}).get(to_id)
     return 0
 def compute_distance_duration_matrix(locations: List[List[float]]) -> Tuple[List[List[int]], List[List[int]]]:
-    body = {
-        "locations": locations,
-        "metrics": ["distance", "duration"]
-    }
-
-    response = requests.post(ORS_MATRIX_URL, json=body, headers=HEADERS)
-    if response.status_code != 200:
-        raise HTTPException(status_code=500, detail=response.text)
-
-    matrix = response.json()
-    return matrix["distances"], matrix["durations"]
+    try:
+        distances, durations = get_routing_provider().matrix(locations)
+        check_reachable([str(location) for location in locations], distances, durations)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Metres / seconds, as the solver expects integer costs
+    return (distances * 1000).round().astype(int).tolist(), durations.round().astype(int).tolist()